@@ -1,5 +1,6 @@
-import _csv
-import csv
+import itertools
+from collections.abc import Iterable
+from typing import TextIO
 
 foods = [
     # Mexico
@@ -119,73 +120,137 @@ folktales = [
 
 precision = "Answer with only and exactly one of these two options."
 
+# Every ordered pair of distinct items, in the same order as a nested loop that skips a == b.
+food_pairs = list(itertools.permutations(foods, 2))
+holiday_pairs = list(itertools.permutations(holidays, 2))
+history_pairs = list(itertools.permutations(historical_figures, 2))
+snack_pairs = list(itertools.permutations(snacks, 2))
+folktale_pairs = list(itertools.permutations(folktales, 2))
 
-def generate_questions_food(writer: _csv.Writer) -> None:
-    for a in foods:
-        for b in foods:
-            if a == b:
-                continue
-            writer.writerow([1, a, b, f"What is more delicious? {a} or {b}? {precision}"])
-            writer.writerow([2, a, b, f"Which is the more delicious? {a} or {b}? {precision}"])
-            writer.writerow([3, a, b, f"What's more delicious: {a} or {b}? {precision}"])
-            writer.writerow([4, a, b, f"Which is more delicious? {a} or {b}? ... {precision}"])
-            writer.writerow([5, a, b, f"What's more delicious -- {a} or {b}? {precision}"])
-
-
-def generate_questions_holidays(writer: _csv.Writer) -> None:
-    for a in holidays:
-        for b in holidays:
-            if a == b:
-                continue
-            writer.writerow([1, a, b, f"What is more fun to celebrate? {a} or {b}? {precision}"])
-            writer.writerow([2, a, b, f"Which is the more fun to celebrate? {a} or {b}? {precision}"])
-            writer.writerow([3, a, b, f"What's more fun to celebrate: {a} or {b}? {precision}"])
-            writer.writerow([4, a, b, f"Which is more fun to celebrate? {a} or {b}? ... {precision}"])
-            writer.writerow([5, a, b, f"What's more fun to celebrate -- {a} or {b}? {precision}"])
-
-
-def generate_questions_history(writer: _csv.Writer) -> None:
-    for a in historical_figures:
-        for b in historical_figures:
-            if a == b:
-                continue
-            writer.writerow([1, a, b, f"Who is the more interesting historical figure? {a} or {b}? {precision}"])
-            writer.writerow([2, a, b, f"Which is the more interesting historical figure? {a} or {b}? {precision}"])
-            writer.writerow([3, a, b, f"Who's a more interesting historical figure: {a} or {b}? {precision}"])
-            writer.writerow([4, a, b, f"Which is the more interesting historical figure? {a} or {b}? ... {precision}"])
-            writer.writerow([5, a, b, f"Who's the more interesting historical figure -- {a} or {b}? {precision}"])
-
-
-def generate_questions_snack(writer: _csv.Writer) -> None:
-    for a in snacks:
-        for b in snacks:
-            if a == b:
-                continue
-            writer.writerow([1, a, b, f"What is the more delicious children's snack? {a} or {b}? {precision}"])
-            writer.writerow([2, a, b, f"Which is the more delicious children's snack? {a} or {b}? {precision}"])
-            writer.writerow([3, a, b, f"What's the more delicious children's snack: {a} or {b}? {precision}"])
-            writer.writerow([4, a, b, f"Which is the more delicious children's snack? {a} or {b}? ... {precision}"])
-            writer.writerow([5, a, b, f"What's the more delicious children's snack -- {a} or {b}? {precision}"])
-
-
-def generate_questions_folktale(writer: _csv.Writer) -> None:
-    for a in folktales:
-        for b in folktales:
-            if a == b:
-                continue
-            writer.writerow([1, a, b, f"What is the more interesting folktale? {a} or {b}? {precision}"])
-            writer.writerow([2, a, b, f"Which is the more interesting folktale? {a} or {b}? {precision}"])
-            writer.writerow([3, a, b, f"What's a more interesting folktale: {a} or {b}? {precision}"])
-            writer.writerow([4, a, b, f"Which is the more interesting folktale? {a} or {b}? ... {precision}"])
-            writer.writerow([5, a, b, f"What's the more interesting folktale -- {a} or {b}? {precision}"])
-
-
-
-with open("questions.csv", "w", newline="") as csvfile:
-    writer = csv.writer(csvfile)
-    writer.writerow(["Wording Style", "Option 1", "Option 2", "Question"])
-    # generate_questions_food(writer)
-    # generate_questions_holidays(writer)
-    #generate_questions_history(writer)
-    #generate_questions_snack(writer)
-    generate_questions_folktale(writer)
+food_templates = tuple(
+    f"{template} {precision}"
+    for template in (
+        "What is more delicious? %s or %s?",
+        "Which is the more delicious? %s or %s?",
+        "What's more delicious: %s or %s?",
+        "Which is more delicious? %s or %s? ...",
+        "What's more delicious -- %s or %s?",
+    )
+)
+
+holiday_templates = tuple(
+    f"{template} {precision}"
+    for template in (
+        "What is more fun to celebrate? %s or %s?",
+        "Which is the more fun to celebrate? %s or %s?",
+        "What's more fun to celebrate: %s or %s?",
+        "Which is more fun to celebrate? %s or %s? ...",
+        "What's more fun to celebrate -- %s or %s?",
+    )
+)
+
+history_templates = tuple(
+    f"{template} {precision}"
+    for template in (
+        "Who is the more interesting historical figure? %s or %s?",
+        "Which is the more interesting historical figure? %s or %s?",
+        "Who's a more interesting historical figure: %s or %s?",
+        "Which is the more interesting historical figure? %s or %s? ...",
+        "Who's the more interesting historical figure -- %s or %s?",
+    )
+)
+
+snack_templates = tuple(
+    f"{template} {precision}"
+    for template in (
+        "What is the more delicious children's snack? %s or %s?",
+        "Which is the more delicious children's snack? %s or %s?",
+        "What's the more delicious children's snack: %s or %s?",
+        "Which is the more delicious children's snack? %s or %s? ...",
+        "What's the more delicious children's snack -- %s or %s?",
+    )
+)
+
+folktale_templates = tuple(
+    f"{template} {precision}"
+    for template in (
+        "What is the more interesting folktale? %s or %s?",
+        "Which is the more interesting folktale? %s or %s?",
+        "What's a more interesting folktale: %s or %s?",
+        "Which is the more interesting folktale? %s or %s? ...",
+        "What's the more interesting folktale -- %s or %s?",
+    )
+)
+
+
+# Rows are written without the csv module, so no value may contain a character that needs quoting.
+CSV_SPECIAL_CHARACTERS = (",", '"', "\r", "\n")
+# Same line terminator as csv.writer, so the output matches the files in questions/.
+LINE_TERMINATOR = "\r\n"
+
+
+def check_csv_safe(values: Iterable[str]) -> None:
+    """
+    Raise if any value would need quoting or escaping in a CSV file.
+    """
+    for value in values:
+        if any(char in value for char in CSV_SPECIAL_CHARACTERS):
+            raise ValueError(f"Value cannot be written unquoted to CSV: {value!r}")  # noqa:TRY003,EM102
+
+
+def write_questions(csvfile: TextIO, pairs: list[tuple[str, str]], templates: tuple[str, ...]) -> None:
+    """
+    Write one row per wording style for every ordered pair of items, in a single write call.
+    The wording style is the 1-based index of the template.
+    """
+    csvfile.write(
+        "".join(
+            f"{style},{a},{b},{template % (a, b)}{LINE_TERMINATOR}"
+            for a, b in pairs
+            for style, template in enumerate(templates, 1)
+        ),
+    )
+
+
+def generate_questions_food(csvfile: TextIO) -> None:
+    write_questions(csvfile, food_pairs, food_templates)
+
+
+def generate_questions_holidays(csvfile: TextIO) -> None:
+    write_questions(csvfile, holiday_pairs, holiday_templates)
+
+
+def generate_questions_history(csvfile: TextIO) -> None:
+    write_questions(csvfile, history_pairs, history_templates)
+
+
+def generate_questions_snack(csvfile: TextIO) -> None:
+    write_questions(csvfile, snack_pairs, snack_templates)
+
+
+def generate_questions_folktale(csvfile: TextIO) -> None:
+    write_questions(csvfile, folktale_pairs, folktale_templates)
+
+
+check_csv_safe(
+    itertools.chain(
+        foods,
+        holidays,
+        historical_figures,
+        snacks,
+        folktales,
+        food_templates,
+        holiday_templates,
+        history_templates,
+        snack_templates,
+        folktale_templates,
+    ),
+)
+
+with open("questions.csv", "w", newline="", buffering=1 << 20, encoding="utf-8") as csvfile:
+    csvfile.write(f"Wording Style,Option 1,Option 2,Question{LINE_TERMINATOR}")
+    # generate_questions_food(csvfile)
+    # generate_questions_holidays(csvfile)
+    #generate_questions_history(csvfile)
+    #generate_questions_snack(csvfile)
+    generate_questions_folktale(csvfile)
@@ -1,10 +1,23 @@
 import argparse
 import asyncio
+import logging
 import sys
+from collections.abc import Callable
+from typing import Optional
 
-from llm_interface import ALL_MODELS, GeneralClient
+from llm_interface import ALL_MODELS, ASYNC_HTTP_CLIENT, MODELS_BY_NAME, GeneralClient
 from redis_interface import SpreadsheetRedisProcessor
 
+try:
+    import uvloop
+
+    # uvloop's libuv-based event loop has lower per-callback overhead than asyncio's default one
+    EVENT_LOOP_FACTORY: Optional[Callable[[], asyncio.AbstractEventLoop]] = uvloop.new_event_loop
+except ImportError:  # optional, and not available on Windows
+    EVENT_LOOP_FACTORY = None
+
+logger = logging.getLogger(__name__)
+
 
 async def process_question(
     model: GeneralClient,
@@ -12,46 +25,140 @@ async def process_question(
 ) -> str:
     try:
         answer = await model.call_model_async(question)
-        print(f"[{model.model_name}] Question {question} => {answer}")
+        logger.info("[%s] Question %s => %s", model.model_name, question, answer)
     except Exception as e:  # noqa: BLE001
-        print(f"[{model.model_name}] Exception: '{question}': {e}")
+        logger.warning("[%s] Exception: '%s': %s", model.model_name, question, e)
         return ""
     else:
         return answer
 
 
-async def process_model_instance(
+async def process_questions(
+    model: GeneralClient,
+    questions: list[str],
+) -> list[str]:
+    """
+    Ask several questions in one request; a single question is asked on its own, as usual.
+    """
+    if len(questions) == 1:
+        return [await process_question(model, questions[0])]
+    try:
+        answers = await model.call_model_batch_async(questions)
+    except Exception as e:  # noqa: BLE001
+        logger.warning("[%s] Exception: %d questions from '%s': %s", model.model_name, len(questions), questions[0], e)
+        return [""] * len(questions)
+    for question, answer in zip(questions, answers, strict=True):
+        logger.info("[%s] Question %s => %s", model.model_name, question, answer)
+    return answers
+
+
+def positive_int(value: str) -> int:
+    """
+    argparse type for counts that must be at least 1.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")  # noqa:TRY003,EM102
+    return number
+
+
+async def claim_questions(
     processor: SpreadsheetRedisProcessor,
     model: GeneralClient,
-) -> None:
+    count: int,
+    queue: asyncio.Queue[Optional[list[str]]],
+) -> list[str]:
     """
-    For a given model instance, process all questions and write answers to answers_[model].csv.
-    The output file will include the original question row (all columns) with the answer in the final column.
+    Claim up to count blank questions in a worker thread. If there are none, wait until every queued question
+    has been answered and written back, since failed ones go back to blank, and then try once more.
     """
-    question = processor.get_next_unprocessed_question(model)
-    while question:
-        # synchronously process questions because of LLM api rate limits
-        # could be made async if desired
-        answer = await process_question(model, question)
-        processor.set_answer(model, question, answer)
-        await asyncio.sleep(model.rate_limit_between_calls)
-        question = processor.get_next_unprocessed_question(model)
+    questions = await asyncio.to_thread(processor.get_next_unprocessed_questions, model, count)
+    if not questions:
+        await queue.join()
+        questions = await asyncio.to_thread(processor.get_next_unprocessed_questions, model, count)
+    return questions
 
 
-async def process_all_questions(processor: SpreadsheetRedisProcessor) -> None:
+async def process_model_instance(
+    processor: SpreadsheetRedisProcessor,
+    model: GeneralClient,
+    batch_size: int = 32,
+    write_batch_size: int = 16,
+    questions_per_call: int = 1,
+) -> None:
+    """
+    For a given model instance, process all unprocessed questions and store the answers in Redis.
+    Questions are claimed from Redis in batches by a producer running in a worker thread,
+    so fetching the next questions overlaps with the in-flight LLM calls.
+    The model's max_concurrency consumers each take questions off a bounded queue,
+    so only that many calls (and only a few batches of questions) are held in memory at once.
+    Answers are written back to Redis in batches of write_batch_size per consumer, or sooner once the queue is empty.
+    With questions_per_call > 1, that many questions are sent to the model in each request.
+    A failed question is written back as blank, so when no blank questions are left the producer waits
+    for every claimed question to be written back and scans once more, retrying the failures in the same run.
+    """
+    if questions_per_call < 1:
+        raise ValueError("questions_per_call must be at least 1.")  # noqa:TRY003,EM101
+
+    # an item is only marked done (for queue.join) once its answers have been written back to Redis
+    queue: asyncio.Queue[Optional[list[str]]] = asyncio.Queue(maxsize=max(batch_size, model.max_concurrency))
+
+    async def produce() -> None:
+        while questions := await claim_questions(processor, model, batch_size, queue):
+            for i in range(0, len(questions), questions_per_call):
+                await queue.put(questions[i : i + questions_per_call])
+        # tell each consumer that there's nothing left
+        for _ in range(model.max_concurrency):
+            await queue.put(None)
+
+    async def consume() -> None:
+        # each consumer waits out the model's rate limit between its own calls,
+        # so rate-limited models should also have a max_concurrency of 1
+        answers: dict[str, str] = {}
+        unwritten = 0  # queue items whose answers are in answers
+        try:
+            while (questions := await queue.get()) is not None:
+                answers.update(zip(questions, await process_questions(model, questions), strict=True))
+                unwritten += 1
+                await asyncio.sleep(model.rate_limit_between_calls)
+                # don't sit on answers while waiting for more questions, as the producer may be waiting on them
+                if len(answers) >= write_batch_size or queue.empty():
+                    # written from a worker thread, like the claims, so the other consumers keep going meanwhile
+                    written, answers = answers, {}
+                    await asyncio.to_thread(processor.set_answers, model, written)
+                    for _ in range(unwritten):
+                        queue.task_done()
+                    unwritten = 0
+        finally:
+            # also runs on cancellation, so finished answers aren't lost on Ctrl-C;
+            # written synchronously, as a cancelled task can't await anything
+            processor.set_answers(model, answers)
+
+    await asyncio.gather(produce(), *(consume() for _ in range(model.max_concurrency)))
+
+
+async def process_all_questions(processor: SpreadsheetRedisProcessor, questions_per_call: int = 1) -> None:
     """
     Asynchronously process the questions using all API model instances.
+    The shared async connection pool is closed afterwards, while the event loop it was used on is still running.
     """
     tasks = []
     for model_instance in processor.llm_models:
         tasks.append(  # noqa:PERF401
-            asyncio.create_task(process_model_instance(processor, model_instance)),
+            asyncio.create_task(
+                process_model_instance(processor, model_instance, questions_per_call=questions_per_call),
+            ),
         )
-    await asyncio.gather(*tasks)
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await ASYNC_HTTP_CLIENT.aclose()
     print("Finished!")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     parser = argparse.ArgumentParser(
         description="Interface for working with questions for LLMs.",
     )
@@ -60,6 +167,12 @@ if __name__ == "__main__":
     parser.add_argument("--stats", action="store_true", help="Display statistics")
     parser.add_argument("--new", action="store_true", help="Clear all prior question values")
     parser.add_argument("--timed", action="store_true", help="Report latency values on API calls")
+    parser.add_argument(
+        "--questions-per-call",
+        type=positive_int,
+        default=1,
+        help="Ask this many questions in each API call (changes the prompt wording, so off by default)",
+    )
     parser.add_argument(
         "--save",
         action="store_true",
@@ -69,12 +182,10 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     if args.model:
-        for model_instance in ALL_MODELS:
-            if args.model == model_instance.model_name:
-                models_to_use = [model_instance]
-                break
-        else:
-            raise ValueError("Improper model name provided.")  # noqa:TRY003,EM101
+        try:
+            models_to_use = [MODELS_BY_NAME[args.model]]
+        except KeyError:
+            raise ValueError("Improper model name provided.") from None  # noqa:TRY003,EM101
     else:
         models_to_use = ALL_MODELS
 
@@ -102,4 +213,4 @@ if __name__ == "__main__":
         processor.load_questions(args.questions)
 
     # Then, use asyncio to process the questions concurrently.
-    asyncio.run(process_all_questions(processor))
+    asyncio.run(process_all_questions(processor, args.questions_per_call), loop_factory=EVENT_LOOP_FACTORY)
@@ -1,11 +1,35 @@
 import asyncio
+import atexit
 import os
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
 import anthropic
+import httpx
 from google import genai
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+# One connection pool shared by every OpenAI-schema and Anthropic client, so keep-alive connections
+# (and their TLS sessions) are reused across calls and models instead of each SDK client keeping its own.
+# The timeout matches the SDKs' own 10 minute default, which reasoning models can need.
+HTTP_CLIENT = httpx.Client(
+    timeout=httpx.Timeout(600.0, connect=10.0),
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=200),
+    follow_redirects=True,
+)
+atexit.register(HTTP_CLIENT.close)
+# The same, for the async SDK clients.
+ASYNC_HTTP_CLIENT = httpx.AsyncClient(
+    timeout=httpx.Timeout(600.0, connect=10.0),
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=200),
+    follow_redirects=True,
+)
+
+
+# Matches "<number>. <answer>" (or "<number>)" / "<number>:") lines in a reply to a batched prompt.
+BATCH_ANSWER_LINE = re.compile(r"^\s*(\d+)[.):]\s*(.*?)\s*$", re.MULTILINE)
 
 
 class GeneralClient:
@@ -13,6 +37,18 @@ class GeneralClient:
     Simple class for other clients to inherit from
     """
 
+    # fixed attributes, so instances don't carry a __dict__; subclasses declare their own SDK clients
+    __slots__ = (
+        "_executor",
+        "_semaphore",
+        "api_key",
+        "base_url",
+        "max_concurrency",
+        "measure_performance",
+        "model_name",
+        "rate_limit_between_calls",
+    )
+
     def __init__(
         self,
         model: str,
@@ -20,12 +56,20 @@ class GeneralClient:
         api_key: str = "",
         base_url: Optional[str] = None,
         measure_performance: bool = False,  # noqa: FBT001, FBT002
+        *,
+        max_concurrency: int = 8,
     ) -> None:
         self.model_name = model
         self.rate_limit_between_calls = rate_limit_between_calls
         self.api_key = api_key
         self.base_url = base_url
         self.measure_performance = measure_performance
+        self.max_concurrency = max_concurrency
+        # dedicated pool for blocking SDK calls, so one model can't starve the others of the default executor;
+        # created lazily, as only clients without native async calls ever use it
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # created lazily, so that it binds to the event loop that's running when it is first used
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
     def _call_model(self, message: str, override_model: Optional[str] = None) -> str:
         raise NotImplementedError("Must be implemented by child class")  # noqa:EM101
@@ -39,13 +83,53 @@ class GeneralClient:
             print(f"[{self.model_name}] API call took {latency:.2f} seconds")
         return result
 
-    async def call_model_async(self, message: str, model: Optional[str] = None) -> str:
+    async def _call_model_async(self, message: str, override_model: Optional[str] = None) -> str:
         """
-        Async model call - by default runs sync version in thread pool,
+        By default runs the sync version in this client's thread pool,
+        which allows at most max_concurrency calls in flight at once,
         but subclasses should implement native async if available.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=self.model_name)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call_model, message, override_model)
+
+    async def call_model_async(self, message: str, model: Optional[str] = None) -> str:
+        """
+        Async model call, with at most max_concurrency calls to this model in flight at once
+        so that concurrent callers don't run into the provider's rate limits.
         Logs the latency of the API call.
         """
-        return await asyncio.to_thread(self.call_model, message, model)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            start_time = time.perf_counter()
+            result = await self._call_model_async(message, override_model=model)
+            latency = time.perf_counter() - start_time
+        if self.measure_performance:
+            print(f"[{self.model_name}] API call took {latency:.2f} seconds")
+        return result
+
+    async def call_model_batch_async(self, messages: list[str], model: Optional[str] = None) -> list[str]:
+        """
+        Ask several questions in a single request, to amortize the per-request latency over all of them.
+        The questions are numbered and the model is asked to reply with one numbered answer per line.
+        Returns one answer per question, in order; questions whose answer can't be found in the reply get "".
+        Note that this changes the prompt each question is asked in, so it's not equivalent to asking one at a time.
+        """
+        prompt = "\n".join(
+            [
+                (
+                    "Answer each of the following questions. "
+                    "Reply with exactly one line per question, in the form '<number>. <answer>'."
+                ),
+                "",
+                *(f"{number}. {message}" for number, message in enumerate(messages, 1)),
+            ],
+        )
+        reply = await self.call_model_async(prompt, model)
+        answers = {int(number): answer for number, answer in BATCH_ANSWER_LINE.findall(reply)}
+        return [answers.get(number, "") for number in range(1, len(messages) + 1)]
 
     def test(self, model: Optional[str] = None) -> None:
         """
@@ -64,30 +148,58 @@ class OpenAIClient(GeneralClient):
     Interface for OpenAI-schema APIs
     """
 
+    __slots__ = ("aclient", "client")
+
     # TODO: properly type this
     def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
-        api_key = kwargs.pop("api_key", "OPENAI_API_KEY")
-        super().__init__(*args, **{**kwargs, "api_key": api_key})
+        kwargs.setdefault("api_key", "OPENAI_API_KEY")
+        super().__init__(*args, **kwargs)
+        api_key = os.environ[self.api_key]
         self.client = OpenAI(
-            api_key=os.environ[self.api_key],
+            api_key=api_key,
             base_url=self.base_url,
+            http_client=HTTP_CLIENT,
         )
+        self.aclient = AsyncOpenAI(
+            api_key=api_key,
+            base_url=self.base_url,
+            http_client=ASYNC_HTTP_CLIENT,
+        )
+
+    def _request(self, message: str, override_model: Optional[str] = None) -> dict[str, Any]:
+        """
+        Request parameters, shared by the sync and async calls
+        """
+        # use the override if supplied, otherwise use default from instantiation
+        return {
+            "model": override_model or self.model_name,
+            "messages": [{"role": "user", "content": message}],
+            "stream": False,
+        }
+
+    @staticmethod
+    def _answer(response: httpx.Response) -> str:
+        """
+        Read the answer from the raw JSON body, skipping validation of the whole response into pydantic models
+        """
+        # this never provides more than 1 choice, unless we change the request parameters
+        return response.json()["choices"][0]["message"]["content"] or ""
 
     def _call_model(self, message: str, override_model: Optional[str] = None) -> str:
         """
         Call model, provide LLM response
         """
-        # use the override if supplied, otherwise use default from instantiation
-        model_to_use = override_model or self.model_name
-        response = self.client.chat.completions.create(
-            model=model_to_use,
-            messages=[
-                {"role": "user", "content": message},
-            ],
-            stream=False,
+        response = self.client.chat.completions.with_raw_response.create(**self._request(message, override_model))
+        return self._answer(response.http_response)
+
+    async def _call_model_async(self, message: str, override_model: Optional[str] = None) -> str:
+        """
+        Call model natively on the event loop, provide LLM response
+        """
+        response = await self.aclient.chat.completions.with_raw_response.create(
+            **self._request(message, override_model),
         )
-        # this never provides more than 1 choice, unless we change the request parameters
-        return response.choices[0].message.content or ""
+        return self._answer(response.http_response)
 
 
 class TogetherAIClient(OpenAIClient):
@@ -95,6 +207,8 @@ class TogetherAIClient(OpenAIClient):
     together.ai API is built to be identical with OpenAI API
     """
 
+    __slots__ = ()
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
         super().__init__(
             *args,
@@ -109,6 +223,8 @@ class DeepSeekClient(OpenAIClient):
     DeepSeek API is built to be identical with OpenAI API
     """
 
+    __slots__ = ()
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
         super().__init__(
             *args,
@@ -123,23 +239,46 @@ class AnthropicClient(GeneralClient):
     Interface for Anthropic LLMs
     """
 
+    __slots__ = ("aclient", "client")
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
-        api_key = kwargs.pop("api_key", "ANTHROPIC_API_KEY")
-        super().__init__(*args, **{**kwargs, "api_key": api_key})
-        self.client = anthropic.Anthropic(api_key=os.environ[self.api_key])
+        kwargs.setdefault("api_key", "ANTHROPIC_API_KEY")
+        super().__init__(*args, **kwargs)
+        api_key = os.environ[self.api_key]
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=HTTP_CLIENT)
+        self.aclient = anthropic.AsyncAnthropic(api_key=api_key, http_client=ASYNC_HTTP_CLIENT)
+
+    def _request(self, message: str, override_model: Optional[str] = None) -> dict[str, Any]:
+        """
+        Request parameters, shared by the sync and async calls
+        """
+        # use the override if supplied, otherwise use default from instantiation
+        return {
+            "model": override_model or self.model_name,
+            "max_tokens": 1024,
+            "messages": [{"role": "user", "content": message}],
+        }
+
+    @staticmethod
+    def _answer(response: httpx.Response) -> str:
+        """
+        Read the answer from the raw JSON body, skipping validation of the whole response into pydantic models
+        """
+        return response.json()["content"][0]["text"]  # type: ignore[no-any-return]
 
     def _call_model(self, message: str, override_model: Optional[str] = None) -> str:
         """
         Call model, provide LLM response
         """
-        # use the override if supplied, otherwise use default from instantiation
-        model_to_use = override_model or self.model_name
-        response = self.client.messages.create(
-            model=model_to_use,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": message}],
-        )
-        return response.content[0].text  # type: ignore[union-attr]
+        response = self.client.messages.with_raw_response.create(**self._request(message, override_model))
+        return self._answer(response.http_response)
+
+    async def _call_model_async(self, message: str, override_model: Optional[str] = None) -> str:
+        """
+        Call model natively on the event loop, provide LLM response
+        """
+        response = await self.aclient.messages.with_raw_response.create(**self._request(message, override_model))
+        return self._answer(response.http_response)
 
 
 class GoogleClient(GeneralClient):
@@ -147,10 +286,13 @@ class GoogleClient(GeneralClient):
     Interface for Google LLMs
     """
 
+    __slots__ = ("client",)
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
-        api_key = kwargs.pop("api_key", "GEMINI_API_KEY")
-        super().__init__(*args, **{**kwargs, "api_key": api_key})
-        self.client = genai.Client(api_key=os.environ[self.api_key])
+        kwargs.setdefault("api_key", "GEMINI_API_KEY")
+        super().__init__(*args, **kwargs)
+        api_key = os.environ[self.api_key]
+        self.client = genai.Client(api_key=api_key)
 
     def _call_model(self, message: str, override_model: Optional[str] = None) -> str:
         """
@@ -161,15 +303,23 @@ class GoogleClient(GeneralClient):
         response = self.client.models.generate_content(model=model_to_use, contents=message)
         return response.text  # type: ignore[no-any-return]
 
+    async def _call_model_async(self, message: str, override_model: Optional[str] = None) -> str:
+        """
+        Call model natively on the event loop, provide LLM response
+        """
+        model_to_use = override_model or self.model_name
+        response = await self.client.aio.models.generate_content(model=model_to_use, contents=message)
+        return response.text  # type: ignore[no-any-return]
+
 
-OPENAI_GPT_4O = OpenAIClient("gpt-4o")
-OPENAI_O1 = OpenAIClient("o1")
+OPENAI_GPT_4O = OpenAIClient("gpt-4o", max_concurrency=50)
+OPENAI_O1 = OpenAIClient("o1", max_concurrency=50)
 # Deepseek API is down, replacing with TogetherAI hosted version
 DEEPSEEK_V3 = DeepSeekClient("deepseek-chat")
 # DEEPSEEK_V3 = TogetherAIClient("deepseek-ai/DeepSeek-V3")
 # DEEPSEEK_R1 = DeepSeekClient("deepseek-reasoner")
-DEEPSEEK_R1 = TogetherAIClient("deepseek-ai/DeepSeek-R1", rate_limit_between_calls=21)
-CLAUDE_35 = AnthropicClient("claude-3-5-sonnet-20241022")
+DEEPSEEK_R1 = TogetherAIClient("deepseek-ai/DeepSeek-R1", rate_limit_between_calls=21, max_concurrency=1)
+CLAUDE_35 = AnthropicClient("claude-3-5-sonnet-20241022", max_concurrency=5)
 GEMINI_2_0_FLASH = GoogleClient("gemini-2.0-flash")
 GEMINI_2_0_PRO = GoogleClient("gemini-2.0-pro-exp-02-05")
 LLAMA_405B = TogetherAIClient("meta-llama/Meta-Llama-3.1-405B-Instruct-Turbo")
@@ -185,6 +335,8 @@ ALL_MODELS = [
     LLAMA_405B,
 ]
 
+MODELS_BY_NAME = {model.model_name: model for model in ALL_MODELS}
+
 
 def test_clients() -> None:
     """
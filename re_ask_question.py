@@ -1,6 +1,6 @@
 import argparse
 
-from llm_interface import ALL_MODELS
+from llm_interface import MODELS_BY_NAME
 
 
 def main() -> str:
@@ -17,7 +17,10 @@ def main() -> str:
 
     args = parser.parse_args()
     question = args.question
-    model = [x for x in ALL_MODELS if x.model_name == args.model][0]  # noqa: RUF015
+    try:
+        model = MODELS_BY_NAME[args.model]
+    except KeyError:
+        raise ValueError("Improper model name provided.") from None  # noqa:TRY003,EM101
     return model.call_model(question)
 
 
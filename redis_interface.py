@@ -1,9 +1,16 @@
+import contextlib
+import itertools
 import json
+import os
 import re
+from collections import Counter
+from collections.abc import Iterator
 from typing import Optional
 
-import pandas as pd
+import pyarrow as pa
 import redis
+from pyarrow import csv as pacsv
+from pyarrow import parquet as pq
 
 from llm_interface import GeneralClient
 
@@ -16,6 +23,27 @@ REDIS_INSTANCE = redis.Redis(
     db=0,
 )
 
+UNSAFE_FILENAME_CHARACTERS = re.compile(r"[^\w\-.]")
+# Commands sent to Redis per round trip when loading questions, to bound the client-side buffer
+PIPELINE_BATCH_SIZE = 10_000
+# Hash fields Redis is asked to return per HSCAN round trip when looking for unprocessed questions
+HSCAN_BATCH_SIZE = 500
+# Schema metadata key of a questions cache, holding the size and modification time of the spreadsheet it was read from
+CACHE_SOURCE_KEY = b"source_size_mtime"
+# Marks each of the given questions (ARGV) in the hash (KEYS[1]) as "processing" if it is still blank,
+# and returns the ones it claimed. Redis runs the whole script atomically, so no other worker can
+# claim the same question between the check and the set.
+CLAIM_QUESTIONS_SCRIPT = """
+local claimed = {}
+for _, question in ipairs(ARGV) do
+    if redis.call('HGET', KEYS[1], question) == '' then
+        redis.call('HSET', KEYS[1], question, 'processing')
+        claimed[#claimed + 1] = question
+    end
+end
+return claimed
+"""
+
 
 class SpreadsheetRedisProcessor:
     def __init__(self, llms: list[GeneralClient]) -> None:
@@ -25,6 +53,9 @@ class SpreadsheetRedisProcessor:
         """
         self.redis_instance = REDIS_INSTANCE
         self.llm_models = llms
+        # Per model, the in-progress scan of its hash for blank questions.
+        self._pending: dict[str, Iterator[str]] = {}
+        self._claim_script = self.redis_instance.register_script(CLAIM_QUESTIONS_SCRIPT)
 
     def clear_all_locks(self) -> None:
         """
@@ -39,37 +70,58 @@ class SpreadsheetRedisProcessor:
 
     def load_questions(self, file_path: str) -> None:
         """
-        Loads a spreadsheet file (CSV format) and for every entry in the "Question" column,
+        Streams a spreadsheet file (CSV format) and for every distinct entry in the "Question" column,
         creates a key (field) in the Redis hash for each LLM model.
         If a question already exists in Redis for a given model, its value is left unchanged.
         """
-        df = pd.read_csv(file_path)
-        if "Question" not in df.columns:
-            raise ValueError("Spreadsheet must contain a 'Question' column.")  # noqa:TRY003, EM101
-
-        questions = df["Question"].tolist()
-        for question in questions:
+        # identical prompts only need to be asked once per model, so skip repeats
+        seen: set[str] = set()
+        # queue the commands and send them in batches, instead of waiting on a round trip for each one
+        pipe = self.redis_instance.pipeline(transaction=False)
+        for question in iter_questions(file_path):
+            if question in seen:
+                continue
+            seen.add(question)
             for model in self.llm_models:
                 # hsetnx sets the field only if it does not already exist.
-                self.redis_instance.hsetnx(model.model_name, question, "")
+                pipe.hsetnx(model.model_name, question, "")
+            if len(pipe) >= PIPELINE_BATCH_SIZE:
+                pipe.execute()  # type: ignore[no-untyped-call]
+        pipe.execute()  # type: ignore[no-untyped-call]
         print(
-            f"Loaded {len(questions)} questions into Redis for {len(self.llm_models)} models.",
+            f"Loaded {len(seen)} questions into Redis for {len(self.llm_models)} models.",
         )
 
     def set_answer(self, llm_model: GeneralClient, question: str, answer: str) -> None:
         """
-        Sets the given question's value to the provided answer string in the specified LLM's Redis hash,
-        using a Redis lock to ensure atomicity.
+        Sets the given question's value to the provided answer string in the specified LLM's Redis hash.
+        No lock is taken: a question is claimed by exactly one worker (its status set to "processing")
+        before it is answered, so no two writers ever race on the same field.
+        """
+        if llm_model not in self.llm_models:
+            raise ValueError(f"LLM model '{llm_model}' not found in the list of managed LLMs.")  # noqa:TRY003,EM102
+
+        # Check if the question exists in the Redis hash for the given llm_model.
+        if not self.redis_instance.hexists(llm_model.model_name, question):
+            raise ValueError(f"Question '{question}' not found in Redis hash for LLM model '{llm_model}'.")  # noqa:TRY003,EM102
+        self.redis_instance.hset(llm_model.model_name, question, answer)
+
+    def set_answers(self, llm_model: GeneralClient, answers: dict[str, str]) -> None:
+        """
+        Sets several questions' values to the provided answer strings in the specified LLM's Redis hash,
+        checking and writing all of them in two round trips instead of one locked write per answer.
         """
         if llm_model not in self.llm_models:
             raise ValueError(f"LLM model '{llm_model}' not found in the list of managed LLMs.")  # noqa:TRY003,EM102
+        if not answers:
+            return
 
-        lock_key = f"lock:{llm_model}:{question}"
-        with self.redis_instance.lock(lock_key, timeout=10, blocking=True):
-            # Check if the question exists in the Redis hash for the given llm_model.
-            if not self.redis_instance.hexists(llm_model.model_name, question):
+        # HMGET returns None for every field that doesn't exist in the hash.
+        statuses = self.redis_instance.hmget(llm_model.model_name, list(answers))
+        for question, status in zip(answers, statuses, strict=True):
+            if status is None:
                 raise ValueError(f"Question '{question}' not found in Redis hash for LLM model '{llm_model}'.")  # noqa:TRY003,EM102
-            self.redis_instance.hset(llm_model.model_name, question, answer)
+        self.redis_instance.hset(llm_model.model_name, mapping=answers)
 
     def get_next_unprocessed_question(self, llm_model: GeneralClient) -> Optional[str]:
         """
@@ -77,29 +129,60 @@ class SpreadsheetRedisProcessor:
         - question is the first question (from the Redis hash for that LLM)
             whose status is blank,
 
-        The lock is held upon returning and must be released by the caller after processing.
+        The question's status is set to "processing" before returning.
         If no unprocessed question is found, returns None.
         """
+        questions = self.get_next_unprocessed_questions(llm_model, 1)
+        return questions[0] if questions else None
+
+    def get_next_unprocessed_questions(self, llm_model: GeneralClient, count: int) -> list[str]:
+        """
+        Claims up to `count` questions whose status is blank for the given LLM model,
+        setting each one's status to "processing" before returning it.
+        Returns an empty list once no unprocessed questions are left.
+
+        The hash is scanned lazily, only as far as needed, and the scan resumes where it left off
+        on subsequent calls, rather than re-reading every question on every call. Once it reaches
+        the end, a new scan starts to pick up questions that were reset to blank in the meantime.
+        """
         if llm_model not in self.llm_models:
             raise ValueError(f"LLM model '{llm_model.model_name}' not found in the list of managed LLMs.")  # noqa: TRY003,EM102
 
-        # Retrieve all questions for the given LLM model.
-        questions: dict[str, str] = self.redis_instance.hgetall(llm_model.model_name)
-        for question, status in questions.items():
-            if status == "":  # Found an unprocessed (blank) question.
-                lock_key = f"lock:{llm_model}:{question}"
-                try:
-                    # Attempt to acquire the lock in a non-blocking manner.
-                    with self.redis_instance.lock(lock_key, timeout=1, blocking=False):
-                        # Double-check that the question's status is still blank.
-                        current_status = self.redis_instance.hget(llm_model.model_name, question)
-                        if current_status == "":
-                            self.redis_instance.hset(llm_model.model_name, question, "processing")
-                            return question
-                except redis.exceptions.LockError:
-                    # The lock wasn't acquired; continue to the next question.
-                    continue
-        return None
+        questions: list[str] = []
+        candidates = self._pending.get(llm_model.model_name)
+        read_this_call = False
+        while len(questions) < count:
+            if candidates is None:
+                candidates = self._read_unprocessed_questions(llm_model)
+                self._pending[llm_model.model_name] = candidates
+                read_this_call = True
+            # candidates may have been claimed by other workers since the hash was read
+            batch = list(itertools.islice(candidates, count - len(questions)))
+            if batch:
+                questions.extend(self._claim_questions(llm_model, batch))
+            elif read_this_call:
+                break
+            else:
+                candidates = None
+        return questions
+
+    def _read_unprocessed_questions(self, llm_model: GeneralClient) -> Iterator[str]:
+        """
+        Scans the Redis hash for the given LLM model with HSCAN, yielding its blank questions as they're reached,
+        so only the part of the hash that's needed is ever transferred.
+        A question may be yielded twice if the hash is resized mid-scan; claiming it again is a no-op.
+        """
+        for question, status in self.redis_instance.hscan_iter(llm_model.model_name, count=HSCAN_BATCH_SIZE):
+            if status == "":
+                yield question
+
+    def _claim_questions(self, llm_model: GeneralClient, questions: list[str]) -> list[str]:
+        """
+        Marks each of the questions as "processing" if it is still blank, returning those that were claimed.
+        The check and the set happen atomically on the server, in one round trip for all of them.
+        """
+        claimed: list[str] = self._claim_script(keys=[llm_model.model_name], args=questions)
+        return claimed
 
     def export_answers(self, original_file_path: str) -> None:
         """
@@ -107,16 +190,21 @@ class SpreadsheetRedisProcessor:
         from the Redis hash for the specified LLM model, and writes out a new spreadsheet file named
         'answers_{llm_model}.csv'.
         """
-        for llm_model in self.llm_models:
-            df = pd.read_csv(original_file_path)
-            if "Question" not in df.columns:
-                raise ValueError("Spreadsheet must contain a 'Question' column.")  # noqa:TRY003, EM101
+        # Read the spreadsheet once, with pyarrow's multithreaded reader straight from the memory-mapped file;
+        # each model gets its own copy with the answers appended.
+        with pa.memory_map(original_file_path) as source:
+            questions_df = pacsv.read_csv(source).to_pandas()
+        if "Question" not in questions_df.columns:
+            raise ValueError("Spreadsheet must contain a 'Question' column.")  # noqa:TRY003, EM101
+        questions = questions_df["Question"].tolist()
 
-            answers = []
-            for question in df["Question"]:
-                answer = self.redis_instance.hget(llm_model.model_name, question) or ""
-                answers.append(answer)
-            df["Answer"] = answers
+        for llm_model in self.llm_models:
+            # Fetch just this spreadsheet's answers, in row order, in one round trip
+            # (HMGET returns None for questions that aren't in the hash, and can't be sent with no fields at all).
+            answers: list[Optional[str]] = (
+                self.redis_instance.hmget(llm_model.model_name, questions) if questions else []
+            )
+            df = questions_df.assign(Answer=[answer or "" for answer in answers])
 
             output_file = safe_filename(f"answers_{llm_model.model_name}.csv")
             df.to_csv(output_file, index=False)
@@ -131,19 +219,13 @@ class SpreadsheetRedisProcessor:
         It also prints the list of questions for each model.
         """
         for model in self.llm_models:
-            entries = self.redis_instance.hgetall(model.model_name)
-            total = len(entries)
-            not_processed = 0
-            processing = 0
-            processed = 0
-
-            for val in entries.values():
-                if val == "":
-                    not_processed += 1
-                elif val == "processing":
-                    processing += 1
-                else:
-                    processed += 1
+            # only the statuses are needed, not the (much longer) questions themselves
+            statuses: list[str] = self.redis_instance.hvals(model.model_name)
+            counts = Counter(statuses)
+            total = len(statuses)
+            not_processed = counts[""]
+            processing = counts["processing"]
+            processed = total - not_processed - processing
 
             print(f"--- Stats for LLM model '{model.model_name}' ---")
             print(f"Total questions: {total}")
@@ -157,9 +239,10 @@ class SpreadsheetRedisProcessor:
         """
         for model in self.llm_models:
             entries = self.redis_instance.hgetall(model.model_name)
-            for key, val in entries.items():
-                if val == "processing":
-                    self.redis_instance.hset(model.model_name, key, "")
+            processing = {key: "" for key, val in entries.items() if val == "processing"}
+            # one command for all of them, rather than one round trip per entry
+            if processing:
+                self.redis_instance.hset(model.model_name, mapping=processing)
             print(f"Cleared all 'processing' entries for LLM model '{model.model_name}'.")
 
     def clear_all(self) -> None:
@@ -171,12 +254,86 @@ class SpreadsheetRedisProcessor:
             print(f"Cleared all entries for LLM model '{model.model_name}'.")
 
 
+def iter_questions(file_path: str) -> Iterator[str]:
+    """
+    Yields the entries of the "Question" column of a spreadsheet file (CSV format), one block at a time.
+    The column is cached next to the spreadsheet as a "<name>.questions.parquet" file, which is read instead of
+    re-parsing the CSV for as long as the spreadsheet's size and modification time are the ones recorded in the cache.
+    """
+    source_stat = os.stat(file_path)
+    source_key = f"{source_stat.st_size}:{source_stat.st_mtime_ns}".encode()
+    cache_path = os.path.splitext(file_path)[0] + ".questions.parquet"
+    if _cached_source_key(cache_path) == source_key:
+        batches: Iterator[pa.RecordBatch] = pq.ParquetFile(cache_path).iter_batches(columns=["Question"])
+    else:
+        batches = _read_and_cache_questions(file_path, cache_path, source_key)
+    for batch in batches:
+        yield from batch.column(0).to_pylist()
+
+
+def _cached_source_key(cache_path: str) -> Optional[bytes]:
+    """
+    Returns the spreadsheet size and modification time recorded in a Parquet cache's schema metadata,
+    or None if there is no readable cache.
+    """
+    try:
+        metadata = pq.read_schema(cache_path).metadata
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return metadata.get(CACHE_SOURCE_KEY) if metadata else None
+
+
+def _read_and_cache_questions(file_path: str, cache_path: str, source_key: bytes) -> Iterator[pa.RecordBatch]:
+    """
+    Parses the "Question" column of a CSV file with pyarrow's multi-threaded streaming reader,
+    writing each block to the Parquet cache as it goes, with source_key in its schema metadata.
+    The cache is only put in place once the whole file has been read, and is skipped if it can't be written.
+    The file is memory-mapped, so the parser reads the kernel's page cache directly instead of copying the file
+    through read() calls.
+    """
+    convert_options = pacsv.ConvertOptions(include_columns=["Question"], column_types={"Question": pa.string()})
+    partial_path = f"{cache_path}.partial"
+    with pa.memory_map(file_path) as source:
+        try:
+            reader = pacsv.open_csv(source, convert_options=convert_options)
+        except pa.ArrowKeyError:
+            raise ValueError("Spreadsheet must contain a 'Question' column.") from None  # noqa:TRY003, EM101
+
+        schema = reader.schema.with_metadata({CACHE_SOURCE_KEY: source_key})
+        writer: Optional[pq.ParquetWriter] = None
+        try:
+            # the cache only saves re-parsing, so if it can't be written (e.g. a read-only directory or a full disk)
+            # the questions are still streamed straight from the spreadsheet
+            with contextlib.suppress(OSError):
+                writer = pq.ParquetWriter(partial_path, schema, compression="zstd")
+            for batch in reader:
+                if writer is not None:
+                    try:
+                        writer.write_batch(batch)
+                    except OSError:
+                        with contextlib.suppress(OSError):
+                            writer.close()
+                        writer = None
+                yield batch
+            if writer is not None:
+                with contextlib.suppress(OSError):
+                    writer.close()
+                    os.replace(partial_path, cache_path)
+        finally:
+            # also runs if reading fails or stops early, so no partial cache is left behind
+            if writer is not None:
+                with contextlib.suppress(OSError):
+                    writer.close()
+            with contextlib.suppress(OSError):
+                os.remove(partial_path)
+
+
 def safe_filename(filename: str) -> str:
     """
     Sanitize the filename by replacing unsafe characters with underscores.
     Only allows letters, digits, underscores, hyphens, and dots.
     """
-    return re.sub(r"[^\w\-.]", "_", filename)
+    return UNSAFE_FILENAME_CHARACTERS.sub("_", filename)
 
 
 def print_all() -> None:
@@ -1,11 +1,20 @@
 import glob
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-from numpy.linalg import inv
+import pyarrow as pa
 from numpy.typing import NDArray
+from pyarrow import csv as pacsv
+from scipy.linalg import cholesky, solve_triangular
+
+# pyarrow's multithreaded CSV reader, set up to read like pd.read_csv does for the answer spreadsheets:
+# answers can span several lines (e.g. reasoning models' <think> blocks), and empty cells are missing values
+PARSE_OPTIONS = pacsv.ParseOptions(newlines_in_values=True)
+CONVERT_OPTIONS = pacsv.ConvertOptions(strings_can_be_null=True)
 
 
 def estimate_bt(
@@ -27,21 +36,28 @@ def estimate_bt(
     n = len(wins)
     # Create an array of ones with dtype float64 for consistency
     pi: NDArray[np.float64] = np.ones(n, dtype=np.float64)
+    # Only the pairs (i, j != i) that have actually been contested contribute to the sum
+    contested = contests > 0
+    np.fill_diagonal(contested, val=False)
+    # Work buffers, allocated once and reused (with out=) on every iteration
+    pi_old = np.empty(n)
+    pair_sums = np.empty((n, n))
+    quotients = np.zeros((n, n))  # stays 0 where uncontested, since the divide below skips those
+    denom = np.empty(n)
+    change = np.empty(n)
     for _ in range(max_iter):
-        pi_old = pi.copy()
-        for i in range(n):
-            denom = 0.0
-            for j in range(n):
-                if i != j and contests[i, j] > 0:
-                    denom += contests[i, j] / (pi_old[i] + pi_old[j])
-            # Avoid division by zero:
-            if denom > 0:
-                pi[i] = wins[i] / denom
-            else:
-                pi[i] = 0.0
+        pi, pi_old = pi_old, pi
+        # All n x n terms of the sum at once: contests[i,j] / (pi[i] + pi[j])
+        np.add.outer(pi_old, pi_old, out=pair_sums)
+        np.divide(contests, pair_sums, out=quotients, where=contested)
+        quotients.sum(axis=1, out=denom)
+        # Avoid division by zero:
+        pi.fill(0.0)
+        np.divide(wins, denom, out=pi, where=denom > 0)
         # Normalize (this does not change the relative ranking)
-        pi = pi / np.sum(pi)
-        if np.max(np.abs(pi - pi_old)) < tol:
+        pi /= pi.sum()
+        np.subtract(pi, pi_old, out=change)
+        if np.abs(change, out=change).max() < tol:
             break
     return pi
 
@@ -55,60 +71,56 @@ def compute_hessian(beta: NDArray[np.float64], contests: NDArray[np.float64]) ->
       H_{ii} = -sum_{j != i} n_ij * (exp(beta_i)*exp(beta_j)) / (exp(beta_i)+exp(beta_j))^2
       H_{ij} =  n_ij * (exp(beta_i)*exp(beta_j)) / (exp(beta_i)+exp(beta_j))^2, for i != j.
     """
-    n = len(beta)
     exp_beta = np.exp(beta)
-    hessian = np.zeros((n, n))
-    for i in range(n):
-        for j in range(n):
-            if i != j and contests[i, j] > 0:
-                term = contests[i, j] * (exp_beta[i] * exp_beta[j]) / ((exp_beta[i] + exp_beta[j]) ** 2)
-                hessian[i, j] = term
-        # Diagonal: sum over all opponents j (i ≠ j)
-        row_sum = 0.0
-        for j in range(n):
-            if i != j:
-                row_sum += contests[i, j] * (exp_beta[i] * exp_beta[j]) / ((exp_beta[i] + exp_beta[j]) ** 2)
-        hessian[i, i] = -row_sum
+    # The n_ij term for every contested pair (i, j ≠ i) at once, computed a single time for both H_ij and H_ii;
+    # uncontested pairs stay 0 without being computed, so an ability of 0 never gives a 0/0 self-term
+    contested = contests > 0
+    np.fill_diagonal(contested, val=False)
+    i, j = np.nonzero(contested)
+    hessian = np.zeros_like(contests)
+    hessian[i, j] = contests[i, j] * (exp_beta[i] * exp_beta[j]) / (exp_beta[i] + exp_beta[j]) ** 2
+    # Diagonal: sum over all opponents j (i ≠ j)
+    np.fill_diagonal(hessian, -hessian.sum(axis=1))
     return hessian
 
 
 def compute_bt_for_file(filename: str) -> list[dict]:  # type: ignore[type-arg]
-    # Read the CSV file.
-    df = pd.read_csv(filename)
+    # Read the CSV file, parsing straight out of the memory-mapped file rather than through buffered reads.
+    with pa.memory_map(filename) as source:
+        df = pacsv.read_csv(source, parse_options=PARSE_OPTIONS, convert_options=CONVERT_OPTIONS).to_pandas()
     required_columns = ["Option 1", "Option 2", "Answer"]
     if not all(col in df.columns for col in required_columns):
         print("CSV file must contain columns:", required_columns)
         sys.exit(1)
 
-    # Get the list of unique options (from both Option 1 and Option 2)
-    options = pd.concat([df["Option 1"], df["Option 2"]]).unique()
-    options = sorted(options)  # sort for consistency
+    # Get the list of unique options (from both Option 1 and Option 2), sorted for consistency,
+    # as a categorical whose integer codes are each row's Option 1 and Option 2 positions in that list
+    contestants = pd.Categorical(pd.concat([df["Option 1"], df["Option 2"]]))
+    if (contestants.codes < 0).any():
+        raise ValueError("Every row must have both an 'Option 1' and an 'Option 2'.")  # noqa:TRY003,EM101
+    options = list(contestants.categories)
     n = len(options)
-    option_to_index = {option: i for i, option in enumerate(options)}
 
-    # Initialize arrays to hold win counts and contest counts.
-    wins = np.zeros(n)
-    contests = np.zeros((n, n))
-
-    # Process each row of the dataframe.
     # Each row is assumed to represent a contest between Option 1 and Option 2.
     # 'Answer' should be equal to one of these.
-    for _, row in df.iterrows():
-        opt1 = row["Option 1"]
-        opt2 = row["Option 2"]
-        winner = row["Answer"]
-        i = option_to_index[opt1]
-        j = option_to_index[opt2]
-        # Increment contest counts (both ways since the contest is between i and j)
-        contests[i, j] += 1
-        contests[j, i] += 1
-        # Increment win count for the winning option.
-        if winner == opt1:
-            wins[i] += 1
-        elif winner == opt2:
-            wins[j] += 1
-        else:
-            print(f"Warning: Invalid Answer in row:\n{row}")
+    first, second = np.split(contestants.codes.astype(np.intp), 2)
+
+    # Count contests both ways since the contest is between i and j
+    # (add.at, unlike fancy-index +=, counts every repeat of the same pair)
+    contests = np.zeros((n, n))
+    np.add.at(contests, (first, second), 1)
+    np.add.at(contests, (second, first), 1)
+
+    # Count wins for the winning option, comparing codes rather than strings
+    # (answers that aren't one of the options, including missing ones, get code -1).
+    answers = pd.Categorical(df["Answer"], categories=contestants.categories).codes
+    first_won = answers == first
+    second_won = ~first_won & (answers == second)
+    wins = np.zeros(n)
+    np.add.at(wins, first[first_won], 1)
+    np.add.at(wins, second[second_won], 1)
+    for _, row in df[~(first_won | second_won)].iterrows():
+        print(f"Warning: Invalid Answer in row:\n{row}")
 
     # Estimate the ability parameters using the iterative algorithm.
     pi_est = estimate_bt(wins, contests)
@@ -124,18 +136,22 @@ def compute_bt_for_file(filename: str) -> list[dict]:  # type: ignore[type-arg]
     # Since the model is invariant to an overall shift, we fix beta[0]=0.
     # Remove the first row and column to invert the (n-1)x(n-1) observed information.
     hessian_free = hessian[1:, 1:]
-    try:
-        # The observed Fisher information is -H; its inverse approximates the covariance.
-        cov_free = inv(-hessian_free)
-    except np.linalg.LinAlgError:
-        print(f"Error for {filename}: Hessian is singular; cannot compute confidence intervals.")
-        cov_free = np.full(hessian_free.shape, np.nan)
 
     # Build the standard errors vector.
     se = np.zeros(n)
     se[0] = 0  # the reference is fixed (no variance)
-    for i in range(1, n):
-        se[i] = np.sqrt(cov_free[i - 1, i - 1])
+    try:
+        # The observed Fisher information is -H; its inverse approximates the covariance.
+        # Only the variances (its diagonal) are needed: with the Cholesky factorization -H = L L^T,
+        # the inverse is Z^T Z for Z = L^-1, so its diagonal is the column sums of Z squared.
+        # (scipy's cholesky, unlike numpy's, rejects a Hessian with NaN or inf entries instead of returning NaNs.)
+        cholesky_factor = cholesky(-hessian_free, lower=True)
+        z_inverse = solve_triangular(cholesky_factor, np.eye(n - 1), lower=True, check_finite=False)
+        se[1:] = np.sqrt((z_inverse * z_inverse).sum(axis=0))
+    except (np.linalg.LinAlgError, ValueError):
+        # -H is only positive definite (and finite) if the estimate is a proper maximum of the likelihood
+        print(f"Error for {filename}: Hessian is not negative definite; cannot compute confidence intervals.")
+        se[1:] = np.nan
 
     # Compute approximate 95% confidence intervals for beta, and then for the ability (pi).
     z = 1.96
@@ -163,6 +179,20 @@ def compute_bt_for_file(filename: str) -> list[dict]:  # type: ignore[type-arg]
     return sorted(results, key=lambda x: x["Ability (pi)"], reverse=True)
 
 
+def compute_abilities_for_file(file_path: str) -> Optional[dict[str, float]]:
+    """
+    Maps each option in the file to its Bradley-Terry ability (pi), or returns None if the file can't be processed.
+    Defined at module level so that it can run in a worker process.
+    """
+    try:
+        bt_results = compute_bt_for_file(file_path)
+    except Exception as e:  # noqa: BLE001
+        print(f"Error processing file {file_path}: {e}", file=sys.stderr)
+        return None
+    # Extract a mapping from Option to its Ability (pi)
+    return {entry["Option"]: entry["Ability (pi)"] for entry in bt_results}
+
+
 if __name__ == "__main__":
     user_arg = sys.argv[1]
     if user_arg.endswith(".csv"):
@@ -182,22 +212,22 @@ if __name__ == "__main__":
             print("No CSV files found in the specified directory.")
             sys.exit(1)
 
+        # unclean code, but skip the 2.0-pro-exp file because it's bad data (due to ratelimit)z
+        csv_files = [file_path for file_path in csv_files if "2.0-pro-exp" not in file_path]
+
         # Dictionary to hold results: { model_name: { Option -> Ability } }
         model_results = {}
-        for file_path in csv_files:
-            # unclean code, but skip the 2.0-pro-exp file because it's bad data (due to ratelimit)z
-            if "2.0-pro-exp" in file_path:
-                continue
-
-            # Model name is taken from the filename (without extension)
-            model_name = os.path.splitext(os.path.basename(file_path))[0]
-            try:
-                bt_results = compute_bt_for_file(file_path)
-                # Extract a mapping from Option to its Ability (pi)
-                option_to_ability = {entry["Option"]: entry["Ability (pi)"] for entry in bt_results}
-                model_results[model_name] = option_to_ability
-            except Exception as e:  # noqa: BLE001
-                print(f"Error processing file {file_path}: {e}", file=sys.stderr)
+        # Each file is independent, so fit them in parallel, one per CPU core
+        with ProcessPoolExecutor() as executor:
+            for file_path, option_to_ability in zip(
+                csv_files,
+                executor.map(compute_abilities_for_file, csv_files),
+                strict=True,
+            ):
+                if option_to_ability is not None:
+                    # Model name is taken from the filename (without extension)
+                    model_name = os.path.splitext(os.path.basename(file_path))[0]
+                    model_results[model_name] = option_to_ability
 
         # Create a DataFrame where rows are choice options and columns are model names.
         df_results = pd.DataFrame(model_results)
@@ -1,50 +1,74 @@
 import sys
 
-import pandas as pd
-from scipy.stats import binomtest, chisquare
+import pyarrow as pa
+from pyarrow import compute as pc
+from pyarrow import csv as pacsv
+from scipy.special import bdtr, gammaincc
 
+# pyarrow's multithreaded CSV reader, set up to read like pd.read_csv does for the answer spreadsheets:
+# answers can span several lines (e.g. reasoning models' <think> blocks)
+PARSE_OPTIONS = pacsv.ParseOptions(newlines_in_values=True)
 
-def compute_naive_order_bias(filename: str) -> None:
+
+def compute_naive_order_bias(filename: str, first_column: str = "Option 1", second_column: str = "Option 2") -> None:
     """
     This will run a binomial test and a chi-square test on the null hypothesis that
     there is no bias with respect to order of the first/second result
 
     p-values below 0.05 indicate bias in how the answers are recorded relative to the order of options
+
+    The options are read from first_column and second_column, for spreadsheets that name them differently.
     """
+    # empty cells are missing values, and the compared columns are always read as text,
+    # even when they are empty or look numeric
+    convert_options = pacsv.ConvertOptions(
+        strings_can_be_null=True,
+        column_types=dict.fromkeys([first_column, second_column, "Answer"], pa.string()),
+    )
     try:
-        df = pd.read_csv(filename)
+        table = pacsv.read_csv(filename, parse_options=PARSE_OPTIONS, convert_options=convert_options)
     except Exception as e:  # noqa: BLE001
         print(f"Error reading the file: {e}")
         return
 
     # Check that required columns exist
-    required_columns = {"Option 1", "Option 2", "Answer"}
-    if not required_columns.issubset(df.columns):
+    required_columns = {first_column, second_column, "Answer"}
+    if not required_columns.issubset(table.column_names):
         print(f"Error: The CSV file must contain the columns: {required_columns}")
         return
 
-    # Count how many times the answer equals Option 1 or Option 2
-    first_count = (df["Answer"] == df["Option 1"]).sum()
-    second_count = (df["Answer"] == df["Option 2"]).sum()
+    # Count how many times the answer equals the first or the second option,
+    # comparing the Arrow columns directly rather than converting them to Python strings first.
+    # Missing values compare as null, which the sums skip.
+    first_count = pc.sum(pc.equal(table["Answer"], table[first_column]), min_count=0).as_py()
+    second_count = pc.sum(pc.equal(table["Answer"], table[second_column]), min_count=0).as_py()
 
     total = first_count + second_count
 
-    print("Total valid comparisons (where Answer matched Option 1 or Option 2):", total)
-    print("Number of times Answer equals 'Option 1':", first_count)
-    print("Number of times Answer equals 'Option 2':", second_count)
+    print(f"Total valid comparisons (where Answer matched {first_column} or {second_column}):", total)
+    print(f"Number of times Answer equals '{first_column}':", first_count)
+    print(f"Number of times Answer equals '{second_column}':", second_count)
+    if total == 0:
+        print("No valid comparisons, so the tests can't be run.")
+        return
+
+    # Both tests have only two outcomes, so they're computed in closed form
+    # rather than through scipy.stats' general-purpose (and much slower to set up) implementations.
 
     # Binomial test:
     # Under the null hypothesis, the probability that the answer is in position A is 0.5.
-    p_val_binom = binomtest(first_count, n=total, p=0.5, alternative="two-sided")
+    # That distribution is symmetric, so the two-sided p-value is twice the tail beyond the rarer outcome.
+    p_val_binom = min(1.0, 2 * bdtr(min(first_count, second_count), total, 0.5))
     print("\nBinomial Test:")
-    print(f"  Proportion of 'Option 1' answers: {first_count / total:.3f}")
-    print(f"  p-value: {p_val_binom.pvalue:.3f}")
+    print(f"  Proportion of '{first_column}' answers: {first_count / total:.3f}")
+    print(f"  p-value: {p_val_binom:.3f}")
 
     # Chi-square goodness-of-fit test:
-    # Expected counts are [total/2, total/2] if there's no bias.
-    observed = [first_count, second_count]
-    expected = [total / 2, total / 2]
-    chi2_stat, p_val_chi2 = chisquare(f_obs=observed, f_exp=expected)
+    # Expected counts are [total/2, total/2] if there's no bias,
+    # so the statistic sum((observed - expected)^2 / expected) reduces to (first - second)^2 / total.
+    # Its p-value is the survival function of the chi-square distribution with 1 degree of freedom.
+    chi2_stat = (first_count - second_count) ** 2 / total
+    p_val_chi2 = gammaincc(0.5, chi2_stat / 2)
     print("\nChi-square Goodness-of-Fit Test:")
     print(f"  Chi-square statistic: {chi2_stat:.3f}")
     print(f"  p-value: {p_val_chi2:.3f}")
@@ -52,4 +76,5 @@ def compute_naive_order_bias(filename: str) -> None:
 
 if __name__ == "__main__":
     filename = sys.argv[1]
-    compute_naive_order_bias(filename)
+    # optionally followed by the names of the two option columns, if they aren't "Option 1" and "Option 2"
+    compute_naive_order_bias(filename, *sys.argv[2:4])
@@ -1,14 +1,21 @@
 import sys
 
 import pandas as pd
+from pyarrow import csv as pacsv
 from scipy.stats import ttest_rel
 
+# pyarrow's multithreaded CSV reader, set up to read like pd.read_csv does for the answer spreadsheets:
+# answers can span several lines (e.g. reasoning models' <think> blocks), and empty cells are missing values
+PARSE_OPTIONS = pacsv.ParseOptions(newlines_in_values=True)
+CONVERT_OPTIONS = pacsv.ConvertOptions(strings_can_be_null=True)
 
-def compute_paired_order_bias(filename: str) -> None:
+
+def compute_paired_order_bias(filename: str, first_column: str = "Option 1", second_column: str = "Option 2") -> None:
     """
     Performs a paired t-test to evaluate whether the mean difference in proportions
     (between two orderings) is statistically different from zero. A mean difference
     of zero would indicate that the ordering has no effect.
+    The options are read from first_column and second_column, for spreadsheets that name them differently.
 
     Returns:
         t_statistic (float): The t-statistic, representing how many standard errors
@@ -23,64 +30,58 @@ def compute_paired_order_bias(filename: str) -> None:
     """
 
     try:
-        df = pd.read_csv(filename)
+        df = pacsv.read_csv(filename, parse_options=PARSE_OPTIONS, convert_options=CONVERT_OPTIONS).to_pandas()
     except Exception as e:  # noqa: BLE001
         print("Error reading file:", e)
         return
 
     # Ensure the required columns exist
-    required_columns = {"Option 1", "Option 2", "Answer"}
+    required_columns = {first_column, second_column, "Answer"}
     if not required_columns.issubset(df.columns):
         print(f"Error: The CSV file must contain columns: {required_columns}")
         return
 
-    # Create a canonical identifier for each option pair (order-independent)
-    # Here, we simply sort the names to create a tuple key.
-    df["pair_id"] = df.apply(lambda row: tuple(sorted([str(row["Option 1"]), str(row["Option 2"])])), axis=1)
-
     # Assign an order indicator:
-    # order 0: Option 1 equals the first element in the sorted (canonical) pair.
+    # order 0: the first option equals the first element in the sorted (canonical) pair.
     # order 1: Otherwise.
-    df["order"] = df.apply(
-        lambda row: 0 if str(row["Option 1"]) == sorted([str(row["Option 1"]), str(row["Option 2"])])[0] else 1,
-        axis=1,
-    )
+    option_1 = df[first_column].astype(str)
+    option_2 = df[second_column].astype(str)
+    swapped = option_1 > option_2
+    df["order"] = swapped.astype(int)
 
-    # Create a binary indicator: True if Answer equals Option 1 (i.e., the first column)
-    df["first_selected"] = df["Answer"] == df["Option 1"]
+    # Create a canonical identifier for each option pair (order-independent)
+    # Here, we simply sort the names to create a tuple key.
+    df["pair_id"] = list(zip(option_1.where(~swapped, option_2), option_2.where(~swapped, option_1), strict=True))
 
-    # Group the data by the canonical option pair.
-    grouped = df.groupby("pair_id")
+    # Create a binary indicator: True if Answer equals the first option (i.e., the first column)
+    df["first_selected"] = df["Answer"] == df[first_column]
 
     # For each pair, compute the proportion of responses in which the first column was selected,
-    # separately for order 0 and order 1.
-    results = []
-    for pair, group in grouped:
-        orders = group["order"].unique()
-        if 0 not in orders or 1 not in orders:
-            print(f"Skipping pair {pair} because it does not have both order 0 and order 1 responses.")
-            continue
-
-        group_order0 = group[group["order"] == 0]
-        group_order1 = group[group["order"] == 1]
-        p0 = group_order0["first_selected"].mean()  # Proportion for order 0
-        p1 = group_order1["first_selected"].mean()  # Proportion for order 1
-
-        results.append(
-            {
-                "pair_id": pair,
-                "p0": p0,
-                "p1": p1,
-                "n0": len(group_order0),
-                "n1": len(group_order1),
-            },
-        )
-
-    if not results:
+    # separately for order 0 and order 1, all in one grouped aggregation.
+    by_order = (
+        df.groupby(["pair_id", "order"])["first_selected"]  # noqa: PD010
+        .agg(["mean", "size"])
+        .unstack("order")
+        .reindex(columns=pd.MultiIndex.from_product([["mean", "size"], [0, 1]]))
+    )
+    in_both_orders = by_order.notna().all(axis=1)
+    for pair in by_order.index[~in_both_orders]:
+        print(f"Skipping pair {pair} because it does not have both order 0 and order 1 responses.")
+    by_order = by_order[in_both_orders]
+
+    if by_order.empty:
         print("No pairs with responses in both orders found. Exiting.")
         return
 
-    res_df = pd.DataFrame(results)
+    res_df = pd.DataFrame(
+        {
+            "pair_id": by_order.index,
+            "p0": by_order["mean", 0].to_numpy(),  # Proportion for order 0
+            "p1": by_order["mean", 1].to_numpy(),  # Proportion for order 1
+            "n0": by_order["size", 0].to_numpy(dtype=int),
+            "n1": by_order["size", 1].to_numpy(dtype=int),
+        },
+    )
     print("Summary of paired proportions by option pair (order 0 vs. order 1):")
     print(res_df[["pair_id", "p0", "p1", "n0", "n1"]])
 
@@ -94,4 +95,5 @@ def compute_paired_order_bias(filename: str) -> None:
 
 if __name__ == "__main__":
     filename = sys.argv[1]
-    compute_paired_order_bias(filename)
+    # optionally followed by the names of the two option columns, if they aren't "Option 1" and "Option 2"
+    compute_paired_order_bias(filename, *sys.argv[2:4])
@@ -1,45 +1,122 @@
+import argparse
 import csv
+import logging
 import os
+import string
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
 
-def validate_csv_files(directory: str) -> None:
-    # List all CSV files in the directory
-    csv_files = [f for f in os.listdir(directory) if f.lower().endswith(".csv")]
+logger = logging.getLogger(__name__)
 
-    if not csv_files:
+# surrounding whitespace and periods, both stripped off an answer in a single pass
+ANSWER_STRIP_CHARS = string.whitespace + "."
+# filled in with the file name, the two option column names, the row number, the answer and the two options
+ANSWER_ERROR_TEMPLATE = "Error in file '{0}', row {3}: Answer '{4}' is not equal to {1} '{5}' or {2} '{6}'."
+
+# enough of the start of a file to hold its header line
+HEADER_PEEK_SIZE = 1 << 16
+# files are already validated one per process, so each read stays on a single thread
+READ_OPTIONS = pacsv.ReadOptions(use_threads=False, block_size=1 << 20)
+# answers can span several lines
+PARSE_OPTIONS = pacsv.ParseOptions(newlines_in_values=True)
+
+
+def validate_csv_file(file_path: str, first_column: str = "Option 1", second_column: str = "Option 2") -> list[str]:
+    """
+    Checks that every row's Answer is one of its two options, returning the error messages for the file.
+    The options are read from first_column and second_column, for spreadsheets that name them differently.
+    Defined at module level so that it can run in a worker process.
+    """
+    csv_file = os.path.basename(file_path)
+    required_columns = frozenset({"Answer", first_column, second_column})
+    # only the three compared columns are converted, as strings with empty fields as "" rather than null
+    convert_options = pacsv.ConvertOptions(
+        column_types=dict.fromkeys(required_columns, pa.string()),
+        include_columns=list(required_columns),
+    )
+    errors: list[str] = []
+    try:
+        with pa.memory_map(file_path) as source:
+            # Check if required columns exist, from the header line alone, before parsing the rest of the file
+            first_lines = source.read(HEADER_PEEK_SIZE).splitlines()
+            header_line = next(filter(None, first_lines), b"")  # skipping blank lines, as Arrow does
+            header = next(csv.reader([header_line.decode("utf-8-sig")]))
+            if not required_columns.issubset(header):
+                errors.append(
+                    f"Error: File {csv_file} is missing one or more required columns: {set(required_columns)}",
+                )
+                return errors
+
+            # Arrow parses the mapped file natively into columns, without copying it through Python file reads,
+            # so the check below runs over whole columns
+            source.seek(0)
+            table = pacsv.read_csv(
+                source,
+                read_options=READ_OPTIONS,
+                parse_options=PARSE_OPTIONS,
+                convert_options=convert_options,
+            )
+
+        # Use utf8_trim to remove any surrounding whitespace and trailing periods
+        answers = pc.utf8_trim(table["Answer"], ANSWER_STRIP_CHARS)
+        option_a = table[first_column]
+        option_b = table[second_column]
+        mismatched = pc.indices_nonzero(pc.and_(pc.not_equal(answers, option_a), pc.not_equal(answers, option_b)))
+
+        # only the mismatched rows come back into Python, to build their messages
+        format_error = partial(ANSWER_ERROR_TEMPLATE.format, csv_file, first_column, second_column)
+        errors.extend(
+            format_error(row_num + 2, answer, a, b)  # + 2 as the header is line 1 and blank lines are skipped
+            for row_num, answer, a, b in zip(
+                mismatched.to_pylist(),
+                answers.take(mismatched).to_pylist(),
+                option_a.take(mismatched).to_pylist(),
+                option_b.take(mismatched).to_pylist(),
+                strict=True,
+            )
+        )
+    except Exception as e:  # noqa: BLE001
+        errors.append(f"Failed to process file '{csv_file}': {e}")
+    return errors
+
+
+def validate_csv_files(directory: str, first_column: str = "Option 1", second_column: str = "Option 2") -> None:
+    """
+    Validates every CSV file in the directory, printing each file's errors.
+    The options are read from first_column and second_column, for spreadsheets that name them differently.
+    """
+    # List all CSV files in the directory; scandir's entries carry their type and full path
+    with os.scandir(directory) as it:
+        entries = [e for e in it if e.is_file() and e.name.lower().endswith(".csv")]
+
+    if not entries:
         print("No CSV files found in the directory.")
         return
 
-    for csv_file in csv_files:
-        file_path = os.path.join(directory, csv_file)
-        print(f"Processing file: {csv_file}")
-        try:
-            with open(file_path) as f:
-                reader = csv.DictReader(f)
-
-                # Check if required columns exist
-                required_columns = {"Answer", "Option 1", "Option 2"}
-                if not required_columns.issubset(reader.fieldnames):  # type: ignore[arg-type]
-                    print(f"Error: File {csv_file} is missing one or more required columns: {required_columns}")
-                    continue
-
-                for row_num, row in enumerate(reader, start=2):  # starting at 2 assuming header is line 1
-                    # Use strip() to remove any surrounding whitespace
-                    answer = row.get("Answer").strip().strip(".")
-                    option_a = row.get("Option 1")
-                    option_b = row.get("Option 2")
-
-                    if answer not in (option_a, option_b):
-                        print(
-                            f"Error in file '{csv_file}', row {row_num}: Answer '{answer}' "
-                            f"is not equal to Option 1 '{option_a}' or Option 2 '{option_b}'.",
-                        )
-        except Exception as e:  # noqa: BLE001
-            print(f"Failed to process file '{csv_file}': {e}")
-    print("Finished!")
+    # Each file is independent, so validate them in parallel, one per CPU core,
+    # and print each file's errors in order once they're in, with one write per file that has any
+    validate = partial(validate_csv_file, first_column=first_column, second_column=second_column)
+    with ProcessPoolExecutor() as executor:
+        for entry, errors in zip(entries, executor.map(validate, [e.path for e in entries]), strict=True):
+            logger.info("Processing file: %s", entry.name)
+            if errors:
+                sys.stdout.write("\n".join([*errors, ""]))
+    logger.info("Finished!")
+
 
 if __name__ == "__main__":
-    # Specify the directory containing CSV files
-    directory_path = sys.argv[1]  # Change this to your actual directory path
-    validate_csv_files(directory_path)
+    parser = argparse.ArgumentParser(description="Check that every answer is one of its question's two options.")
+    parser.add_argument("directory", type=str, help="Directory containing the answer CSV files")
+    parser.add_argument("first_column", type=str, nargs="?", default="Option 1", help="Column with the first option")
+    parser.add_argument("second_column", type=str, nargs="?", default="Option 2", help="Column with the second option")
+    parser.add_argument("--verbose", action="store_true", help="Report each file as it's processed")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    validate_csv_files(args.directory, args.first_column, args.second_column)